@@ -1,8 +1,10 @@
 # === simulation_core.py ===
-import random
 import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
+from numba import njit, prange
 from tqdm import tqdm
 
 class Event:
@@ -31,68 +33,235 @@ class GlobalFactors:
             self.unemployment = 0.09
             self.econ_policy_index = 0.9
 
-class Person:
-    def __init__(self, sex, urban=True):
-        self.sex = sex
-        self.age = 0
-        self.partner = None
-        self.children = []
-        self.copulated = False
-        self.education = random.uniform(0, 1)
-        self.income = random.uniform(0.2, 1.0)
-        self.urban = urban
-
-    def fertility(self):
-        if self.sex == 'f':
-            if self.age < 20: return 0.8
-            elif 20 <= self.age <= 30: return 1.0
-            elif 31 <= self.age <= 35: return 0.8
-            elif 36 <= self.age <= 40: return 0.5
-            elif 41 <= self.age <= 45: return 0.2
-            else: return 0.01
-        else:
-            if self.age < 20: return 0.9
-            elif 20 <= self.age <= 35: return 1.0
-            elif 36 <= self.age <= 50: return 0.8
-            elif 51 <= self.age <= 65: return 0.3
-            else: return 0.1
-
-    def mortality(self, healthcare_quality=0.8):
-        a, b, c, d, e = 0.005, 1, 0.0001, 0.0001, 0.077
-        base = a * math.exp(-b * self.age) + c + d * math.exp(e * self.age)
-        m1 = 1 - (healthcare_quality * 0.5)
-        m2 = 1 - ((self.income + self.education) / 4)
-        return base * m1 * m2
-
-def conception_prob(person, partner, child_support=0.0, education_impact=0.5):
-    fertility = person.fertility() * partner.fertility()
-    n_children = len(person.children)
-    base_prob = min(fertility * 0.25 * 12, 1) / (n_children + 1)
-    education_modifier = 1 - (person.education * education_impact)
-    if not person.urban:
-        education_modifier = 1 - (person.education * education_impact * 0.5)
-    income_modifier = 1 + (person.income * 0.1) + (child_support * (n_children + 1))
+MALE, FEMALE = 0, 1
+MAX_AGE = 120
+
+def _mortality_base(ages):
+    a, b, c, d, e = 0.005, 1, 0.0001, 0.0001, 0.077
+    return a * np.exp(-b * ages) + c + d * np.exp(e * ages)
+
+MORT_BASE = _mortality_base(np.arange(MAX_AGE + 1, dtype=np.float32))
+FERT_F = np.array([0.8] * 20 + [1.0] * 11 + [0.8] * 5 + [0.5] * 5 + [0.2] * 5 + [0.01] * (MAX_AGE + 1 - 46), dtype=np.float32)
+FERT_M = np.array([0.9] * 20 + [1.0] * 16 + [0.8] * 15 + [0.3] * 15 + [0.1] * (MAX_AGE + 1 - 66), dtype=np.float32)
+
+def make_population(n, sex=MALE, urban=True, rng=None):
+    if rng is None:
+        rng = np.random.default_rng()
+    return {
+        "ages": np.zeros(n, dtype=np.int16),
+        "sex": np.full(n, sex, dtype=np.uint8),
+        "urban": np.full(n, urban, dtype=np.bool_),
+        "education": rng.uniform(0, 1, n).astype(np.float32),
+        "income": rng.uniform(0.2, 1.0, n).astype(np.float32),
+        "partner": np.full(n, -1, dtype=np.int32),
+        "copulated": np.zeros(n, dtype=np.bool_),
+        "n_children": np.zeros(n, dtype=np.int16),
+    }
+
+def concat_populations(*pops):
+    return {k: np.concatenate([p[k] for p in pops]) for k in pops[0]}
+
+def remove_dead(pop, dead):
+    # widow the partners of the dead, then compact and shift partner indices to the survivors' new positions
+    partner = pop["partner"]
+    widowed = partner[dead]
+    partner[widowed[widowed >= 0]] = -1
+    alive = ~dead
+    old_to_new = np.cumsum(alive, dtype=np.int32) - 1
+    survivors = {k: v[alive] for k, v in pop.items()}
+    partner = survivors["partner"]
+    linked = partner >= 0
+    partner[linked] = old_to_new[partner[linked]]
+    return survivors
+
+@njit(fastmath=True, cache=True)
+def mortality(age, income, education, healthcare_quality=0.8):
+    m1 = np.float32(1) - healthcare_quality * np.float32(0.5)
+    return MORT_BASE[min(age, MAX_AGE)] * m1 * (np.float32(1) - (income + education) * np.float32(0.25))
+
+@njit(fastmath=True, cache=True)
+def _survive_and_age_one(i, ages, income, education, copulated, death_draws, income_draws,
+                         healthcare_quality, econ_policy_index, dead):
+    dead[i] = death_draws[i] < mortality(ages[i], income[i], education[i], healthcare_quality)
+    ages[i] += 1
+    copulated[i] = False
+    if 18 <= ages[i] <= 65:
+        income[i] = min(np.float32(1), income[i] + income_draws[i] * econ_policy_index)
+
+@njit(parallel=True, fastmath=True, error_model='numpy', cache=True)
+def _survive_and_age(ages, income, education, copulated, death_draws, income_draws,
+                     healthcare_quality, econ_policy_index, dead):
+    for i in prange(ages.size):
+        _survive_and_age_one(i, ages, income, education, copulated, death_draws, income_draws,
+                             healthcare_quality, econ_policy_index, dead)
+
+# numba's default workqueue threading layer aborts the process on concurrent parallel calls,
+# e.g. two Streamlit sessions running at once
+_parallel_kernel_lock = threading.Lock()
+
+def _survive_and_age_locked(*args):
+    with _parallel_kernel_lock:
+        _survive_and_age(*args)
+
+# single-threaded, GIL-free build for ensembles, which parallelise over replicates instead
+@njit(fastmath=True, error_model='numpy', nogil=True, cache=True)
+def _survive_and_age_serial(ages, income, education, copulated, death_draws, income_draws,
+                            healthcare_quality, econ_policy_index, dead):
+    for i in range(ages.size):
+        _survive_and_age_one(i, ages, income, education, copulated, death_draws, income_draws,
+                             healthcare_quality, econ_policy_index, dead)
+
+def conception_prob(pop, female, male, child_support=0.0, education_impact=0.5):
+    fert = FERT_F[np.minimum(pop["ages"][female], MAX_AGE)] * FERT_M[np.minimum(pop["ages"][male], MAX_AGE)]
+    n_children = pop["n_children"][female]
+    base_prob = np.minimum(fert * 0.25 * 12, 1) / (n_children + 1)
+    education_modifier = 1 - (pop["education"][female] * np.float32(education_impact)
+                              * np.where(pop["urban"][female], np.float32(1.0), np.float32(0.5)))
+    income_modifier = 1 + (pop["income"][female] * np.float32(0.1)) + np.float32(child_support) * (n_children + 1)
     return base_prob * education_modifier * income_modifier
 
+def _normal_age_weights(mean, sd, min_age=0):
+    # share of int(max(normal(mean, sd), min_age)) falling in each age bucket
+    cdf = lambda x: 0.5 * (1 + math.erf((x - mean) / (sd * math.sqrt(2))))
+    edges = np.array([cdf(a) for a in range(MAX_AGE + 2)])
+    weights = np.diff(edges)
+    weights[min_age] = edges[min_age + 1]
+    weights[:min_age] = 0
+    weights[MAX_AGE] += 1 - edges[-1]
+    return weights
+
+def run_cohort_simulation(init_pop_count=1000, n_years=100, urban_ratio=0.6,
+                          base_child_support=0.0, base_education_impact=0.5,
+                          base_healthcare_quality=0.8, events=None):
+    # Leslie-matrix form of run_simulation: one vector of head counts per sex indexed by age,
+    # with education, income and parity carried as per-cohort means instead of per person.
+    if events is None:
+        events = []
+
+    global_factors = GlobalFactors()
+    ages = np.arange(MAX_AGE + 1)
+    adult, in_school, earning = ages >= 18, (ages >= 5) & (ages <= 25), (ages >= 18) & (ages <= 65)
+    rural_discount = urban_ratio + (1 - urban_ratio) * 0.5
+
+    init_weights = _normal_age_weights(30, 20)
+    immigrant_weights = _normal_age_weights(25, 10, min_age=18)
+    n_m = init_weights * (init_pop_count // 2)
+    n_f = init_weights * (init_pop_count // 2)
+    edu = np.full(MAX_AGE + 1, 0.5)
+    income = np.full(MAX_AGE + 1, 0.6)
+    parity = np.zeros(MAX_AGE + 1)
+
+    child_bearing_ages = []
+    pop_sizes = np.empty(n_years, dtype=np.int32)
+    urban_population = np.empty(n_years, dtype=np.int32)
+    rural_population = np.empty(n_years, dtype=np.int32)
+    avg_education = np.empty(n_years, dtype=np.float32)
+    dependency_ratios = np.empty(n_years)
+    age_distributions = np.empty((n_years, MAX_AGE + 1))
+    init_counts = n_m + n_f
+
+    for year in tqdm(range(n_years)):
+        global_factors.update(year)
+        active_params = {
+            "child_support": base_child_support,
+            "education_impact": base_education_impact[year] if isinstance(base_education_impact, list) else base_education_impact,
+            "healthcare_quality": base_healthcare_quality
+        }
+        for event in events:
+            if event.is_active(year):
+                active_params.update(event.effects)
+
+        immigration_inflow = active_params.get("immigration_inflow", 0) // 2
+        if immigration_inflow:
+            arrivals = immigrant_weights * immigration_inflow
+            totals = n_m + n_f + 2 * arrivals
+            mixed = np.divide(2 * arrivals, totals, out=np.zeros_like(totals), where=totals > 0)
+            edu += (0.5 - edu) * mixed
+            income += (0.4 - income) * mixed
+            parity = parity * n_f / np.where(n_f + arrivals > 0, n_f + arrivals, 1)
+            n_m += arrivals
+            n_f += arrivals
+
+        counts = n_m + n_f
+        total = counts.sum()
+        pop_sizes[year] = round(total)
+        urban_population[year] = round(total * urban_ratio)
+        rural_population[year] = pop_sizes[year] - urban_population[year]
+        avg_education[year] = (edu * counts).sum() / total if total else 0
+        age_distributions[year] = counts
+        working, young, old = counts[15:65].sum(), counts[:15].sum(), counts[65:].sum()
+        dependency_ratios[year] = (young + old) / working if working else 0
+
+        adult_m, adult_f = n_m[adult].sum(), n_f[adult].sum()
+        paired = min(adult_m, adult_f) / adult_f if adult_f else 0
+        male_fert = (FERT_M * n_m)[adult].sum() / adult_m if adult_m else 0
+        conception = (np.minimum(FERT_F * male_fert * 0.25 * 12, 1) / (parity + 1)
+                      * (1 - edu * active_params["education_impact"] * rural_discount)
+                      * (1 + income * 0.1 + active_params["child_support"] * (parity + 1)))
+        births_by_age = np.where(adult, n_f * paired * conception, 0)
+        births = births_by_age.sum()
+        if births:
+            male_ages = (n_m * FERT_M)[adult]
+            child_bearing_ages += np.repeat(ages, np.round(births_by_age).astype(int)).tolist()
+            child_bearing_ages += np.repeat(ages[adult], np.round(births * male_ages / male_ages.sum()).astype(int)).tolist()
+        parity += np.divide(births_by_age, n_f, out=np.zeros_like(n_f), where=n_f > 0)
+        newborn_edu = (edu * births_by_age).sum() / births if births else 0.5
+        newborn_income = (income * births_by_age).sum() / births if births else 0.6
+
+        survival = 1 - MORT_BASE * (1 - active_params["healthcare_quality"] * 0.5) * (1 - (income + edu) / 4)
+        n_m[1:] = n_m[:-1] * survival[:-1]
+        n_f[1:] = n_f[:-1] * survival[:-1]
+        edu[1:], income[1:], parity[1:] = edu[:-1], income[:-1], parity[:-1]
+        n_m[0], n_f[0] = births * 0.5, births * 0.5
+        edu[0], income[0], parity[0] = newborn_edu, newborn_income, 0
+
+        income[earning] = np.minimum(1.0, income[earning] + 0.025 * global_factors.econ_policy_index)
+        edu[in_school] = np.clip(edu[in_school] + 0.02 * active_params["education_impact"], 0.0, 1.0)
+
+    final_counts = n_m + n_f
+
+    return {
+        "population": {"males": n_m, "females": n_f},
+        "pop_sizes": pop_sizes,
+        "init_ages": np.repeat(ages, np.round(init_counts).astype(int)).tolist(),
+        "final_ages": np.repeat(ages, np.round(final_counts).astype(int)).tolist(),
+        "child_bearing_ages": child_bearing_ages,
+        "urban_population": urban_population,
+        "rural_population": rural_population,
+        "avg_education": avg_education,
+        "age_distributions": age_distributions,
+        "dependency_ratios": dependency_ratios
+    }
+
 def run_simulation(init_pop_count=1000, n_years=100, urban_ratio=0.6,
                    base_child_support=0.0, base_education_impact=0.5,
-                   base_healthcare_quality=0.8, events=None):
+                   base_healthcare_quality=0.8, events=None, seed=None,
+                   progress=True, parallel=True):
 
     if events is None:
         events = []
 
+    rng = np.random.default_rng(seed)
+    survive_and_age = _survive_and_age_locked if parallel else _survive_and_age_serial
     global_factors = GlobalFactors()
-    population = [Person('m', random.random() < urban_ratio) for _ in range(init_pop_count // 2)]
-    population += [Person('f', random.random() < urban_ratio) for _ in range(init_pop_count // 2)]
+    half = init_pop_count // 2
+    pop = concat_populations(
+        make_population(half, MALE, rng.random(half) < urban_ratio, rng),
+        make_population(half, FEMALE, rng.random(half) < urban_ratio, rng),
+    )
 
-    init_ages = [max(int(random.normalvariate(30, 20)), 0) for _ in population]
-    for p, a in zip(population, init_ages): p.age = a
+    init_ages = rng.normal(30, 20, pop["ages"].size).clip(0).astype(np.int16)
+    pop["ages"][:] = init_ages
 
-    pop_sizes, child_bearing_ages = [], []
-    urban_population, rural_population, avg_education, dependency_ratios = [], [], [], []
-    age_distributions = []
+    child_bearing_ages = []
+    pop_sizes = np.empty(n_years, dtype=np.int32)
+    urban_population = np.empty(n_years, dtype=np.int32)
+    rural_population = np.empty(n_years, dtype=np.int32)
+    avg_education = np.empty(n_years, dtype=np.float32)
+    dependency_ratios = np.empty(n_years)
+    age_distributions = np.empty((n_years, MAX_AGE + 1), dtype=np.int32)
 
-    for year in tqdm(range(n_years)):
+    for year in tqdm(range(n_years), disable=not progress):
         global_factors.update(year)
         active_params = {
             "child_support": base_child_support,
@@ -104,66 +273,69 @@ def run_simulation(init_pop_count=1000, n_years=100, urban_ratio=0.6,
                 active_params.update(event.effects)
 
         immigration_inflow = active_params.get("immigration_inflow", 0)
-        for _ in range(immigration_inflow // 2):
-            for sex in ['m', 'f']:
-                person = Person(sex, random.random() < urban_ratio)
-                person.age = max(int(random.normalvariate(25, 10)), 18)
-                person.education = random.uniform(0.2, 0.8)
-                person.income = random.uniform(0.2, 0.6)
-                population.append(person)
-
-        pop_sizes.append(len(population))
-        urban_population.append(sum(1 for p in population if p.urban))
-        rural_population.append(len(population) - urban_population[-1])
-        avg_education.append(sum(p.education for p in population) / len(population))
-        current_ages = [p.age for p in population]
-        age_distributions.append(current_ages)
-        working = sum(1 for p in population if 15 <= p.age <= 64)
-        young = sum(1 for p in population if p.age < 15)
-        old = sum(1 for p in population if p.age > 64)
-        dependency_ratios.append((young + old) / working if working else 0)
-
-        babies = []
-        random.shuffle(population)
-        for i in range(len(population) - 1):
-            a, b = population[i], population[i+1]
-            if a.age >= 18 and not a.partner and b.age >= 18 and not b.partner and a.sex != b.sex:
-                a.partner, b.partner = b, a
-            elif a.partner and not a.copulated:
-                a.copulated, a.partner.copulated = True, True
-                female = a if a.sex == 'f' else a.partner
-                male = a.partner if a.sex == 'f' else a
-                prob = conception_prob(female, male, active_params["child_support"], active_params["education_impact"])
-                if random.random() < prob:
-                    baby = Person('m' if random.random() < 0.5 else 'f', female.urban)
-                    baby.education = max(0, min(1, (female.education + male.education) / 2 + random.uniform(-0.1, 0.1)))
-                    baby.income = max(0.2, min(1, (female.income + male.income) / 2 + random.uniform(-0.2, 0.2)))
-                    child_bearing_ages += [female.age, male.age]
-                    female.children.append(baby)
-                    male.children.append(baby)
-                    babies.append(baby)
-
-        deaths = []
-        for p in population:
-            if random.random() < p.mortality(active_params["healthcare_quality"]):
-                if p.partner: p.partner.partner = None
-                deaths.append(p)
-            else:
-                p.age += 1
-                p.copulated = False
-                if 18 <= p.age <= 65:
-                    p.income = min(1.0, p.income + random.uniform(-0.05, 0.1) * global_factors.econ_policy_index)
-
-        population = [p for p in population if p not in deaths] + babies
-        for p in population:
-            if 5 <= p.age <= 25:
-                p.education = min(1.0, max(0.0, p.education + 0.02 * active_params["education_impact"]))
-
-
-    final_ages = [p.age for p in population]
+        n_immigrants = (immigration_inflow // 2) * 2
+        if n_immigrants:
+            immigrants = make_population(n_immigrants, np.tile([MALE, FEMALE], n_immigrants // 2),
+                                         rng.random(n_immigrants) < urban_ratio, rng)
+            immigrants["ages"][:] = rng.normal(25, 10, n_immigrants).clip(18).astype(np.int16)
+            immigrants["education"][:] = rng.uniform(0.2, 0.8, n_immigrants)
+            immigrants["income"][:] = rng.uniform(0.2, 0.6, n_immigrants)
+            pop = concat_populations(pop, immigrants)
+
+        ages, sex, partner, copulated = pop["ages"], pop["sex"], pop["partner"], pop["copulated"]
+        age_hist = np.bincount(np.minimum(ages, MAX_AGE), minlength=MAX_AGE + 1)
+        young, working, old = int(age_hist[:15].sum()), int(age_hist[15:65].sum()), int(age_hist[65:].sum())
+        urban_count = int(pop["urban"].sum())
+        pop_sizes[year] = ages.size
+        urban_population[year] = urban_count
+        rural_population[year] = ages.size - urban_count
+        avg_education[year] = pop["education"].mean() if ages.size else 0
+        age_distributions[year] = age_hist
+        dependency_ratios[year] = (young + old) / working if working else 0
+
+        singles = (partner < 0) & (ages >= 18)
+        m_idx = np.flatnonzero(singles & (sex == MALE))
+        f_idx = np.flatnonzero(singles & (sex == FEMALE))
+        rng.shuffle(m_idx)
+        rng.shuffle(f_idx)
+        k = min(m_idx.size, f_idx.size)
+        partner[m_idx[:k]] = f_idx[:k]
+        partner[f_idx[:k]] = m_idx[:k]
+
+        f_c = np.flatnonzero((sex == FEMALE) & (partner >= 0) & ~copulated)
+        m_c = partner[f_c]
+        copulated[f_c], copulated[m_c] = True, True
+        prob = conception_prob(pop, f_c, m_c, active_params["child_support"], active_params["education_impact"])
+        conceived = rng.random(prob.size) < prob
+        mothers, fathers = f_c[conceived], m_c[conceived]
+        n_babies = mothers.size
+        babies = make_population(n_babies, rng.integers(0, 2, n_babies, dtype=np.uint8), pop["urban"][mothers], rng)
+        babies["education"][:] = np.clip((pop["education"][mothers] + pop["education"][fathers]) * 0.5
+                                         + rng.uniform(-0.1, 0.1, n_babies), 0, 1)
+        babies["income"][:] = np.clip((pop["income"][mothers] + pop["income"][fathers]) * 0.5
+                                      + rng.uniform(-0.2, 0.2, n_babies), 0.2, 1)
+        child_bearing_ages += np.column_stack((ages[mothers], ages[fathers])).ravel().tolist()
+        pop["n_children"][mothers] += 1
+        pop["n_children"][fathers] += 1
+
+        dead = np.empty(ages.size, dtype=np.bool_)
+        survive_and_age(ages, pop["income"], pop["education"], copulated,
+                        rng.random(ages.size, dtype=np.float32),
+                        rng.uniform(-0.05, 0.1, ages.size).astype(np.float32),
+                        np.float32(active_params["healthcare_quality"]),
+                        np.float32(global_factors.econ_policy_index), dead)
+
+        pop = concat_populations(remove_dead(pop, dead), babies)
+
+        in_school = (pop["ages"] >= 5) & (pop["ages"] <= 25)
+        pop["education"] += in_school * np.float32(0.02 * active_params["education_impact"])
+        np.clip(pop["education"], 0, 1, out=pop["education"])
+
+
+    final_ages = pop["ages"].copy()
 
     return {
-        "population": population,
+        "population": pop,
         "pop_sizes": pop_sizes,
         "init_ages": init_ages,
         "final_ages": final_ages,
@@ -174,3 +346,16 @@ def run_simulation(init_pop_count=1000, n_years=100, urban_ratio=0.6,
         "age_distributions": age_distributions,
         "dependency_ratios": dependency_ratios
     }
+
+def run_simulation_ensemble(n_reps, base_seed=0, max_workers=None, **kwargs):
+    # replicate r is seeded with base_seed + r and uses the GIL-free serial kernel
+    reserved = {"seed", "progress", "parallel"} & kwargs.keys()
+    if reserved:
+        raise TypeError(f"run_simulation_ensemble sets {', '.join(sorted(reserved))} per replicate; "
+                        "use base_seed to control seeding")
+
+    def replicate(r):
+        return run_simulation(**kwargs, seed=base_seed + r, progress=False, parallel=False)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(replicate, range(n_reps)))
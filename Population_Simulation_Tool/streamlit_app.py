@@ -3,10 +3,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.interpolate import interp1d
 import plotly.graph_objs as go
 
-from simulation_core import run_simulation, Event
+from simulation_core import run_simulation, run_cohort_simulation, Event
 
 st.set_page_config(page_title="Population Simulation", layout="wide")
 st.title("Population & Demographics Simulator")
@@ -14,6 +13,7 @@ st.title("Population & Demographics Simulator")
 st.sidebar.header("Simulation Settings")
 init_pop = st.sidebar.slider("Initial Population", 100, 500000, 10000, step=100)
 n_years = st.sidebar.slider("Simulation Years", 10, 30, 20)
+model = st.sidebar.radio("Simulation Model", ["Agent-based", "Cohort (Leslie matrix)"])
 
 base_child_support = st.sidebar.slider("Child Support", 0.0, 0.5, 0.0, step=0.05)
 base_healthcare_quality = st.sidebar.slider("Healthcare Quality", 0.0, 1.0, 0.8, step=0.05)
@@ -41,8 +41,7 @@ for i, year in enumerate(anchor_years):
 
 st.session_state.edu_impact_values = updated_vals
 
-interpolator = interp1d(anchor_years, updated_vals, kind="linear", bounds_error=False, fill_value="extrapolate")
-edu_impact_series = interpolator(np.arange(n_years)).tolist()
+edu_impact_series = np.interp(np.arange(n_years), anchor_years, updated_vals).tolist()
 
 plot_curve = go.Figure(data=go.Scatter(x=np.arange(n_years), y=edu_impact_series, mode="lines"))
 plot_curve.update_layout(
@@ -78,7 +77,8 @@ if st.sidebar.checkbox("Enable Immigration Wave"):
 if st.sidebar.button("Run Simulation"):
     st.subheader("Running Simulation...")
     with st.spinner("Please wait..."):
-        results = run_simulation(
+        simulate = run_simulation if model == "Agent-based" else run_cohort_simulation
+        results = simulate(
             init_pop_count=init_pop,
             n_years=n_years,
             urban_ratio=urban_ratio,